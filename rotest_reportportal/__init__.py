@@ -2,6 +2,7 @@
 import os
 import time
 import logging
+import functools
 
 import yaml
 from attrdict import AttrDict
@@ -14,6 +15,15 @@ from rotest.core.flow_component import (MODE_CRITICAL, MODE_OPTIONAL,
                                         MODE_FINALLY)
 from reportportal_client import ReportPortalServiceAsync
 
+from rotest_reportportal.coalescing import LogCoalescer
+from rotest_reportportal.buffering import SpillBuffer, SpillQueue
+from rotest_reportportal.fanout import FanOutService, SendingErrorReporter
+from rotest_reportportal.filters import (LoggerLevelFilter, MessageFilter,
+                                         RateLimitFilter, get_level)
+from rotest_reportportal.senders import SenderPool
+from rotest_reportportal.profiling import Profiler, PROFILE_DIRECTORY
+from rotest_reportportal.sampling import PassSampler, SampledService
+
 REPORTPORTAL_TOKEN = "ROTEST_REPORTPORTAL_TOKEN"
 
 
@@ -26,8 +36,29 @@ def timestamp():
     return str(int(time.time() * 1000))
 
 
+def get_token(variable):
+    """Get a Report Portal token from the environment.
+
+    Args:
+        variable (str): name of the environment variable holding the token.
+
+    Returns:
+        str: the token.
+    """
+    if variable not in os.environ:
+        raise ValueError(
+            "You need to define the environment variable {} in "
+            "order to access Report Portal".format(variable))
+
+    return os.environ[variable]
+
+
 def get_configuration():
-    """Get configuration for accessing Report Portal system."""
+    """Get configuration for accessing Report Portal system.
+
+    Results can be sent to several Report Portal systems by listing them under
+    the 'destinations' key, each with its own endpoint, project and token.
+    """
     config_file = search_config_file()
     with open(config_file, "r") as rotest_configuration:
         content = yaml.load(rotest_configuration.read())
@@ -38,14 +69,16 @@ def get_configuration():
             "Instead, found the following content:\n{}".format(config_file,
                                                                content))
 
-    configuration = AttrDict(content["reportportal"])
+    if "destinations" in content["reportportal"]:
+        for destination in content["reportportal"]["destinations"]:
+            destination["token"] = get_token(
+                destination.get("token_variable", REPORTPORTAL_TOKEN))
+            FanOutService.get_level_index(destination.get("level"))
 
-    if REPORTPORTAL_TOKEN not in os.environ:
-        raise ValueError(
-            "You need to define the environment variable {} in "
-            "order to access Report Portal".format(REPORTPORTAL_TOKEN))
+        return AttrDict(content["reportportal"])
 
-    configuration.token = os.environ[REPORTPORTAL_TOKEN]
+    configuration = AttrDict(content["reportportal"])
+    configuration.token = get_token(REPORTPORTAL_TOKEN)
     return configuration
 
 
@@ -61,9 +94,19 @@ class ReportPortalLogHandler(logging.Handler):
         log.addHandler(ReportPortalLogHandler(service=service))
         log.info("Regular message in here")
 
+    Bursts of log lines can be merged into multi-line entries by passing a
+    coalescer (as a keyword argument), in which case :meth:`flush` must be
+    called whenever the current test item changes. The Report Portal level
+    of each logging level can be overridden the same way, using the
+    `level_conversion` keyword argument.
+
     Attributes:
         service (ReportPortalServiceAsync): Endpoint for interacting with
             Report Portal.
+        coalescer (LogCoalescer): merges consecutive messages into a single
+            entry, or None to send every message on its own.
+        level_conversion (dict): Report Portal log level of each logging
+            level, overriding the default `LOGGING_LEVEL_CONVERSION`.
     """
     FORMAT = "%(message)s"
 
@@ -76,25 +119,59 @@ class ReportPortalLogHandler(logging.Handler):
     }
 
     def __init__(self, service, *args, **kwargs):
+        coalescer = kwargs.pop("coalescer", None)
+        level_conversion = kwargs.pop("level_conversion", None)
         super(ReportPortalLogHandler, self).__init__(*args, **kwargs)
         self.service = service
+        self.coalescer = coalescer
+        self.level_conversion = dict(self.LOGGING_LEVEL_CONVERSION)
+        if level_conversion is not None:
+            self.level_conversion.update(
+                (get_level(level), report_portal_level)
+                for level, report_portal_level in level_conversion.items())
+
         self.setFormatter(logging.Formatter(self.FORMAT))
 
     def emit(self, record):
         try:
             message = self.format(record)
+            level = self.level_conversion[record.levelno]
 
-            self.service.log(
-                time=timestamp(),
-                message=message,
-                level=self.LOGGING_LEVEL_CONVERSION[record.levelno])
+            if self.coalescer is None:
+                self.service.log(time=timestamp(),
+                                 message=message,
+                                 level=level)
+                return
+
+            entry = self.coalescer.add(created=record.created,
+                                       time=timestamp(),
+                                       level=level,
+                                       message=message)
+            if entry is not None:
+                self.service.log(**entry)
 
         except Exception:
             self.handleError(record)
             raise
 
+    def flush(self):
+        """Send the log entry being coalesced, if there is one."""
+        if self.coalescer is None:
+            return
+
+        self.acquire()
+        try:
+            entry = self.coalescer.flush()
+            if entry is not None:
+                self.service.log(**entry)
+
+        finally:
+            self.release()
+
 
 class ReportPortalHandler(AbstractResultHandler):
+    # pylint: disable=too-many-instance-attributes
+    # Every optional feature keeps its own state on the handler.
     """Send tests results and logs to the Report Portal system.
 
     Attributes:
@@ -104,6 +181,20 @@ class ReportPortalHandler(AbstractResultHandler):
         log_handler (ReportPortalLogHandler): A log handler to send every log
             message to the Report Portal system. Logs can be sent only when
             a test is currently running.
+        senders (int): number of worker threads sending the test items'
+            events, or None to send all events from a single thread.
+        buffer (dict): memory budget of the pending events and comments,
+            beyond which they are spilled to disk, or None for no limit.
+        sampler (PassSampler): chooses which passing tests are reported in
+            full, or None to report all of them.
+        rate_limit (RateLimitFilter): limits the rate of log records sent
+            for every test item, or None for no limit.
+        sampled_test (object): the test whose events are currently held back
+            until its outcome is known, or None.
+        omitted_passes (list): number of passing tests left out of the report,
+            for the launch and for every suite currently running.
+        profiler (Profiler): measures the hooks and samples the stacks of the
+            plugin until the end of the run, or None when not profiling.
     """
     NAME = "reportportal"
 
@@ -122,18 +213,98 @@ class ReportPortalHandler(AbstractResultHandler):
                                TestOutcome.FAILED: "PRODUCT_BUG",
                                TestOutcome.SKIPPED: "NO_DEFECT"}
 
+    PASSING_OUTCOMES = (TestOutcome.SUCCESS, TestOutcome.EXPECTED_FAILURE)
+
+    SAMPLING_SUMMARY_NAME = "Sampled out passing tests"
+
+    PROFILED_HOOKS = ("start_test_run", "start_test", "stop_test",
+                      "start_composite", "stop_composite", "add_skip",
+                      "add_failure", "add_error", "add_unexpected_success")
+
     def __init__(self, main_test, *args, **kwargs):
         super(ReportPortalHandler, self).__init__(main_test=main_test,
                                                   *args, **kwargs)
 
         configuration = get_configuration()
-        self.service = ReportPortalServiceAsync(
-            endpoint=configuration.endpoint,
-            project=configuration.project,
-            token=configuration.token)
+        self.senders = configuration.senders \
+            if "senders" in configuration else None
+        self.buffer = dict(configuration.buffer) \
+            if "buffer" in configuration else None
+
+        if "destinations" in configuration:
+            self.service = FanOutService([
+                (self.create_service(endpoint=destination.endpoint,
+                                     project=destination.project,
+                                     token=destination.token,
+                                     error_handler=SendingErrorReporter(
+                                         destination.endpoint)),
+                 destination.get("level"))
+                for destination in configuration.destinations])
+
+        else:
+            self.service = self.create_service(
+                endpoint=configuration.endpoint,
+                project=configuration.project,
+                token=configuration.token)
+
+        self.sampler = None
+        if "sampling" in configuration:
+            self.sampler = PassSampler(**configuration.sampling)
+            self.service = SampledService(self.service)
+
+        coalescer = None
+        if "coalescing" in configuration:
+            coalescer = LogCoalescer(**configuration.coalescing)
+
+        self.log_handler = ReportPortalLogHandler(
+            self.service,
+            coalescer=coalescer,
+            level_conversion=configuration.log_levels
+            if "log_levels" in configuration else None)
+
+        self.rate_limit = None
+        if "filters" in configuration:
+            filters = configuration.filters
+            if "levels" in filters:
+                self.log_handler.addFilter(LoggerLevelFilter(filters.levels))
+
+            if "include" in filters or "exclude" in filters:
+                self.log_handler.addFilter(
+                    MessageFilter(include=filters.get("include", ()),
+                                  exclude=filters.get("exclude", ())))
+
+            if "rate_limit" in filters:
+                self.rate_limit = RateLimitFilter(**filters.rate_limit)
+                self.log_handler.addFilter(self.rate_limit)
 
-        self.log_handler = ReportPortalLogHandler(self.service)
         self.comments = []
+        if self.buffer is not None:
+            self.comments = SpillBuffer(**self.buffer)
+        self.sampled_test = None
+        self.omitted_passes = [0]
+
+        self.profiler = None
+        profiling = dict(configuration.profiling) \
+            if "profiling" in configuration else None
+        if PROFILE_DIRECTORY in os.environ:
+            profiling = profiling or {}
+            profiling["output"] = os.environ[PROFILE_DIRECTORY]
+
+        if profiling is not None:
+            self.profiler = Profiler(**profiling)
+            for hook in self.PROFILED_HOOKS:
+                setattr(self, hook, self.profiler.wrap(hook,
+                                                       getattr(self, hook)))
+
+            self.log_handler.emit = self.profiler.wrap("emit",
+                                                       self.log_handler.emit)
+            self.service.terminate = self.profiler.wrap(
+                "terminate", self.service.terminate)
+            # Stopping the profiler writes the results, so it's done only
+            # after the timing of the last hook is recorded.
+            self.stop_test_run = self.profiler.wrap_last("stop_test_run",
+                                                         self.stop_test_run)
+            self.profiler.start()
 
     def start_test_run(self):
         """Called once before any tests are executed."""
@@ -151,12 +322,98 @@ class ReportPortalHandler(AbstractResultHandler):
             description=description,
             mode=mode)
 
+    def create_service(self, endpoint, project, token, **kwargs):
+        """Create a service for sending events to a Report Portal system.
+
+        Args:
+            endpoint (str): address of the Report Portal system.
+            project (str): name of the project to report to.
+            token (str): the user's UUID.
+
+        Returns:
+            object: a `SenderPool` if several senders or a buffer are
+                configured, a `ReportPortalServiceAsync` otherwise.
+        """
+        if self.senders is None and self.buffer is None:
+            return ReportPortalServiceAsync(endpoint=endpoint,
+                                            project=project,
+                                            token=token,
+                                            **kwargs)
+
+        if self.buffer is not None:
+            kwargs["queue_factory"] = functools.partial(SpillQueue,
+                                                        **self.buffer)
+
+        return SenderPool(endpoint=endpoint,
+                          project=project,
+                          token=token,
+                          workers=self.senders or 1,
+                          **kwargs)
+
+    def clear_comments(self):
+        """Forget the failure reasons collected for the finished test."""
+        if self.buffer is None:
+            self.comments = []
+
+        else:
+            self.comments.clear()
+
+    def report_omitted_passes(self):
+        """Log the number of passing tests left out of the current item."""
+        omitted_passes = self.omitted_passes.pop()
+        if omitted_passes > 0:
+            self.service.log(
+                time=timestamp(),
+                level="INFO",
+                message="{} passing tests were not reported individually "
+                        "(sampled at a rate of {})".format(
+                            omitted_passes, self.sampler.pass_rate))
+
+    def report_launch_omitted_passes(self):
+        """Report the passing tests left out outside of any suite.
+
+        Logs can't be attached to the launch itself, so the number is logged
+        in an item of its own, added at the end of the launch.
+        """
+        if self.omitted_passes[-1] == 0:
+            self.omitted_passes.pop()
+            return
+
+        self.service.start_test_item(
+            name=self.SAMPLING_SUMMARY_NAME,
+            description="Passing tests which were not part of any suite, "
+                        "and were not reported individually",
+            start_time=timestamp(),
+            item_type="Suite")
+        self.report_omitted_passes()
+        self.service.finish_test_item(end_time=timestamp(),
+                                      status="PASSED")
+
+    def report_suppressed_logs(self):
+        """Log the number of records dropped by the rate limit."""
+        suppressed = self.rate_limit.reset()
+        if suppressed > 0:
+            self.service.log(
+                time=timestamp(),
+                level="WARN",
+                message="{} log messages were suppressed by the rate "
+                        "limit".format(suppressed))
+
     def start_test(self, test):
         """Called when the given test is about to be run.
 
         Args:
             test (object): test item instance.
         """
+        self.log_handler.flush()
+        if self.rate_limit is not None:
+            self.report_suppressed_logs()
+
+        if self.sampler is not None and self.sampled_test is None and \
+                not self.sampler.should_report(test.data.name):
+            self.sampled_test = test
+            self.service.start_recording()
+
         item_type = "STEP"
         description = test.shortDescription()
 
@@ -197,6 +454,9 @@ class ReportPortalHandler(AbstractResultHandler):
             start_time=timestamp(),
             item_type="Suite")
 
+        if self.sampler is not None:
+            self.omitted_passes.append(0)
+
     def stop_composite(self, test):
         """Called when the given TestSuite has been run.
 
@@ -211,18 +471,43 @@ class ReportPortalHandler(AbstractResultHandler):
         else:
             status = "FAILED"
 
+        if self.sampler is not None:
+            self.report_omitted_passes()
+
         self.service.finish_test_item(end_time=timestamp(),
                                       status=status)
 
     def stop_test_run(self):
         """Called once after all tests are executed."""
+        if self.sampler is not None:
+            self.report_launch_omitted_passes()
+
         self.service.finish_launch(end_time=timestamp())
         self.service.terminate()
+        if self.buffer is not None:
+            self.comments.close()
 
     def stop_test(self, test):
         """Called once after a test is finished."""
         core_log.removeHandler(self.log_handler)
+        self.log_handler.flush()
+        if self.rate_limit is not None:
+            self.report_suppressed_logs()
+
         exception_type = test.data.exception_type
+
+        if self.sampled_test is not None:
+            if exception_type not in self.PASSING_OUTCOMES:
+                self.sampled_test = None
+                self.service.flush()
+
+            elif test is self.sampled_test:
+                self.sampled_test = None
+                self.service.discard()
+                self.omitted_passes[-1] += 1
+                self.clear_comments()
+                return
+
         status = self.EXCEPTION_TYPE_TO_STATUS.get(exception_type, "FAILED")
 
         issue = None
@@ -239,7 +524,7 @@ class ReportPortalHandler(AbstractResultHandler):
                                       status=status,
                                       issue=issue)
 
-        self.comments = []
+        self.clear_comments()
 
     def add_skip(self, test, reason):
         self.comments.append(reason)
@@ -253,6 +538,7 @@ class ReportPortalHandler(AbstractResultHandler):
         self.comments.append(reason)
 
     def add_unexpected_success(self, test):
+        self.log_handler.flush()
         self.service.log(time=timestamp(),
                          message="The test was supposed to fail, but instead "
                                  "it passed",
@@ -0,0 +1,213 @@
+"""Buffers keeping recent items in memory and spilling older ones to disk."""
+import shutil
+import struct
+import pickle
+import tempfile
+import threading
+import collections
+
+try:
+    import queue
+
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
+import psutil
+
+
+class SpillBuffer(object):
+    # pylint: disable=too-many-instance-attributes
+    """A FIFO buffer, which spills its oldest items to a file when too large.
+
+    Items are kept serialized in memory. Once the memory budget is exceeded,
+    the oldest items in memory are moved to a temporary file, one after the
+    other as length-prefixed records, and they are read back sequentially
+    before the items still in memory. The file is emptied whenever all of
+    its records were read, and its unread records are moved to a new file
+    once most of it was read, so its size follows the number of unread
+    records rather than the total number of records ever spilled.
+
+    Attributes:
+        max_bytes (int): budget of serialized bytes kept in memory, or None
+            for no limit.
+        max_rss (int): budget of the process' resident memory in bytes, or
+            None for no limit. While it's exceeded, only `retained_bytes`
+            of the most recent items are kept in memory.
+        retained_bytes (int): serialized bytes kept in memory while the
+            process' resident memory is over budget.
+        memory (collections.deque): serialized items kept in memory.
+        memory_bytes (int): total size of the items kept in memory.
+        spilled (int): number of unread items in the file.
+    """
+    LENGTH = struct.Struct("!I")
+    RSS_CHECK_INTERVAL = 100
+    COMPACT_SIZE = 2 ** 20
+
+    def __init__(self, max_bytes=None, max_rss=None, retained_bytes=65536):
+        self.max_bytes = max_bytes
+        self.max_rss = max_rss
+        self.retained_bytes = retained_bytes
+        self.memory = collections.deque()
+        self.memory_bytes = 0
+        self.spilled = 0
+        self._file = None
+        self._file_size = 0
+        self._read_position = 0
+        self._appends = 0
+        self._over_rss = False
+
+    def __len__(self):
+        return self.spilled + len(self.memory)
+
+    def __iter__(self):
+        position = self._read_position
+        for _ in range(self.spilled):
+            data, position = self._read_record(position)
+            yield pickle.loads(data)
+
+        for data in list(self.memory):
+            yield pickle.loads(data)
+
+    def append(self, item):
+        """Add an item at the end of the buffer.
+
+        Args:
+            item (object): a picklable object.
+        """
+        data = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        self.memory.append(data)
+        self.memory_bytes += len(data)
+
+        if self.max_rss is not None:
+            self._appends += 1
+            if self._appends % self.RSS_CHECK_INTERVAL == 0:
+                self._over_rss = \
+                    psutil.Process().memory_info().rss > self.max_rss
+
+        budget = self.max_bytes
+        if self._over_rss:
+            budget = self.retained_bytes if budget is None \
+                else min(budget, self.retained_bytes)
+
+        if budget is not None:
+            while self.memory and self.memory_bytes > budget:
+                self._spill()
+
+    def popleft(self):
+        """Remove and return the item at the start of the buffer.
+
+        Returns:
+            object: the oldest item in the buffer.
+        """
+        if self.spilled > 0:
+            data, self._read_position = self._read_record(self._read_position)
+            self.spilled -= 1
+            if self.spilled == 0:
+                self._truncate()
+
+            elif self._read_position >= self.COMPACT_SIZE and \
+                    self._read_position * 2 >= self._file_size:
+                self._compact()
+
+            return pickle.loads(data)
+
+        data = self.memory.popleft()
+        self.memory_bytes -= len(data)
+        return pickle.loads(data)
+
+    def clear(self):
+        """Remove all the items from the buffer."""
+        self.memory.clear()
+        self.memory_bytes = 0
+        if self.spilled > 0:
+            self._truncate()
+            self.spilled = 0
+
+    def close(self):
+        """Remove all the items, and delete the file if there is one."""
+        self.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _spill(self):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="rotest_reportportal_")
+
+        data = self.memory.popleft()
+        self.memory_bytes -= len(data)
+        self._file.seek(self._file_size)
+        self._file.write(self.LENGTH.pack(len(data)))
+        self._file.write(data)
+        self._file_size += self.LENGTH.size + len(data)
+        self.spilled += 1
+
+    def _truncate(self):
+        self._file.seek(0)
+        self._file.truncate()
+        self._file_size = 0
+        self._read_position = 0
+
+    def _compact(self):
+        compacted = tempfile.TemporaryFile(prefix="rotest_reportportal_")
+        self._file.seek(self._read_position)
+        shutil.copyfileobj(self._file, compacted)
+        self._file.close()
+        self._file = compacted
+        self._file_size -= self._read_position
+        self._read_position = 0
+
+    def _read_record(self, position):
+        self._file.seek(position)
+        length, = self.LENGTH.unpack(self._file.read(self.LENGTH.size))
+        data = self._file.read(length)
+        return data, position + self.LENGTH.size + length
+
+
+class SpillQueue(object):
+    """A thread-safe queue over a :class:`SpillBuffer`.
+
+    Implements the parts of the `queue.Queue` interface used by the senders,
+    and takes the same arguments as :class:`SpillBuffer`.
+    """
+    def __init__(self, **kwargs):
+        self.buffer = SpillBuffer(**kwargs)
+        self.not_empty = threading.Condition()
+
+    def qsize(self):
+        """Return the number of items in the queue."""
+        with self.not_empty:
+            return len(self.buffer)
+
+    def put_nowait(self, item):
+        """Add an item at the end of the queue."""
+        with self.not_empty:
+            self.buffer.append(item)
+            self.not_empty.notify()
+
+    put = put_nowait
+
+    def get(self, block=True, timeout=None):
+        """Remove and return the item at the start of the queue.
+
+        Args:
+            block (bool): whether to wait for an item if the queue is empty.
+            timeout (float): maximal time in seconds to wait, or None.
+
+        Returns:
+            object: the oldest item in the queue.
+        """
+        with self.not_empty:
+            if not block and len(self.buffer) == 0:
+                raise queue.Empty()
+
+            while len(self.buffer) == 0:
+                if not self.not_empty.wait(timeout) and \
+                        len(self.buffer) == 0:
+                    raise queue.Empty()
+
+            return self.buffer.popleft()
+
+    def get_nowait(self):
+        """Remove and return the oldest item, without waiting for one."""
+        return self.get(block=False)
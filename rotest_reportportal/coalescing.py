@@ -0,0 +1,67 @@
+"""Merging of bursts of log lines into multi-line log entries."""
+
+
+class LogCoalescer(object):
+    """Merge consecutive log messages of the same level into one entry.
+
+    An entry keeps the time of its first message, and is closed when a
+    message of a different level arrives, when the time window since its
+    first message has passed, or when adding a message would exceed the
+    maximal entry size.
+
+    Attributes:
+        window (float): maximal time in seconds between the first and the
+            last message of an entry.
+        max_size (int): maximal length of an entry's text.
+        entry (dict): the entry currently being built, or None.
+    """
+    def __init__(self, window=0.1, max_size=4096):
+        self.window = window
+        self.max_size = max_size
+        self.entry = None
+        self.created = None
+        self.lines = []
+        self.size = 0
+
+    def add(self, created, time, level, message):
+        """Add a message, returning the entry it closed if there is one.
+
+        Args:
+            created (float): creation time of the message, in seconds.
+            time (str): timestamp of the message as sent to Report Portal.
+            level (str): Report Portal log level of the message.
+            message (str): the formatted message.
+
+        Returns:
+            dict: the closed entry, or None.
+        """
+        closed = None
+        if self.entry is not None and \
+                (level != self.entry["level"] or
+                 created - self.created > self.window or
+                 self.size + len(message) + 1 > self.max_size):
+            closed = self.flush()
+
+        if self.entry is None:
+            self.entry = {"time": time, "level": level}
+            self.created = created
+            self.size = len(message)
+
+        else:
+            self.size += len(message) + 1
+
+        self.lines.append(message)
+        return closed
+
+    def flush(self):
+        """Close the current entry.
+
+        Returns:
+            dict: the closed entry, or None if there was none.
+        """
+        entry, self.entry = self.entry, None
+        if entry is not None:
+            entry["message"] = "\n".join(self.lines)
+            self.lines = []
+
+        return entry
@@ -0,0 +1,142 @@
+"""Reporting of the same events to several Report Portal destinations."""
+import logging
+import threading
+from timeit import default_timer
+
+
+logger = logging.getLogger(__name__)
+
+
+class SendingErrorReporter(object):
+    """Log the errors that occur while sending events to a destination.
+
+    Used as the error handler of each destination's service, so a failing
+    destination keeps running instead of stopping the reporting altogether.
+    Since an unavailable destination fails on every event, only the first
+    error is logged in full, and later ones are counted and summarized at
+    most once per interval, and when the service is terminated.
+
+    Attributes:
+        destination (str): name of the destination, for the log messages.
+        interval (float): minimal time in seconds between error summaries.
+        errors (int): total number of errors.
+        unreported (int): number of errors not logged yet.
+    """
+    def __init__(self, destination, interval=60):
+        self.destination = destination
+        self.interval = interval
+        self.errors = 0
+        self.unreported = 0
+        self.last_report = None
+        self.lock = threading.Lock()
+
+    def __call__(self, exc_info):
+        with self.lock:
+            self.errors += 1
+            now = default_timer()
+            if self.last_report is None:
+                self.last_report = now
+                logger.error("Failed sending an event to %s",
+                             self.destination, exc_info=exc_info)
+
+            elif now - self.last_report >= self.interval:
+                self.last_report = now
+                self.unreported += 1
+                self._log_summary(exc_info[1])
+
+            else:
+                self.unreported += 1
+
+    def summarize(self):
+        """Log the number of errors that weren't logged yet, if any."""
+        with self.lock:
+            if self.unreported > 0:
+                self._log_summary()
+
+    def _log_summary(self, last_error=None):
+        logger.error("Failed sending %d more events to %s (%d in total)%s",
+                     self.unreported, self.destination, self.errors,
+                     ", last error: {!r}".format(last_error)
+                     if last_error is not None else "")
+        self.unreported = 0
+
+
+class FanOutService(object):
+    """Send every event to several Report Portal services.
+
+    Each service keeps its own queue and sending thread, so a slow or failing
+    destination doesn't hold up the others, nor the tests themselves.
+
+    Attributes:
+        destinations (list): pairs of a service and the minimal log level it
+            receives (e.g. "WARN"), or None to receive all logs.
+    """
+    LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+
+    def __init__(self, destinations):
+        self.destinations = [(service, self.get_level_index(level))
+                             for service, level in destinations]
+
+    @classmethod
+    def get_level_index(cls, level):
+        """Return the severity index of a destination's minimal log level.
+
+        Args:
+            level (str): Report Portal log level, or None for all levels.
+
+        Returns:
+            int: index of the level in `LEVELS`, or None.
+        """
+        if level is None:
+            return None
+
+        if level not in cls.LEVELS:
+            raise ValueError(
+                "Unknown log level {!r} for a Report Portal destination, "
+                "expected one of {}".format(level, ", ".join(cls.LEVELS)))
+
+        return cls.LEVELS.index(level)
+
+    def _send(self, method, **kwargs):
+        for service, _ in self.destinations:
+            getattr(service, method)(**kwargs)
+
+    def start_launch(self, **kwargs):
+        """Start the launch in all the destinations."""
+        self._send("start_launch", **kwargs)
+
+    def finish_launch(self, **kwargs):
+        """Finish the launch in all the destinations."""
+        self._send("finish_launch", **kwargs)
+
+    def start_test_item(self, **kwargs):
+        """Start a test item in all the destinations."""
+        self._send("start_test_item", **kwargs)
+
+    def finish_test_item(self, **kwargs):
+        """Finish a test item in all the destinations."""
+        self._send("finish_test_item", **kwargs)
+
+    def log(self, time, message, level=None, attachment=None):
+        """Send a log message to the destinations accepting its level."""
+        level_index = self.LEVELS.index(level) if level in self.LEVELS \
+            else None
+
+        for service, minimal_level in self.destinations:
+            if minimal_level is None or level_index is None or \
+                    level_index >= minimal_level:
+                service.log(time=time, message=message, level=level,
+                            attachment=attachment)
+
+    def terminate(self, nowait=False):
+        """Stop all the services, sending their remaining events first.
+
+        Args:
+            nowait (bool): whether to drop the remaining events instead.
+        """
+        for service, _ in self.destinations:
+            service.terminate(nowait=nowait)
+            error_handler = getattr(service, "error_handler", None)
+            if isinstance(error_handler, SendingErrorReporter) and \
+                    not getattr(type(service), "SUMMARIZES_ERRORS", False):
+                error_handler.summarize()
@@ -0,0 +1,142 @@
+"""Log filters, to drop unwanted records before they are formatted."""
+import re
+import logging
+
+
+def get_level(level):
+    """Return the numeric value of a logging level.
+
+    Args:
+        level (object): level number, or name (e.g. "WARNING").
+
+    Returns:
+        int: the level's number.
+    """
+    if isinstance(level, int):
+        return level
+
+    number = logging.getLevelName(str(level).upper())
+    if not isinstance(number, int):
+        raise ValueError("Unknown logging level {!r}".format(level))
+
+    return number
+
+
+class LoggerLevelFilter(logging.Filter):
+    """Drop records below the minimal level configured for their logger.
+
+    The level of a logger applies to its children as well, unless they have
+    a level of their own. Records of unlisted loggers are kept.
+
+    Attributes:
+        levels (dict): minimal level of each logger name.
+    """
+    def __init__(self, levels):
+        super(LoggerLevelFilter, self).__init__()
+        self.levels = {name: get_level(level)
+                       for name, level in levels.items()}
+        self._cache = {}
+
+    def get_minimal_level(self, name):
+        """Return the minimal level for records of the given logger.
+
+        Args:
+            name (str): the logger's name.
+
+        Returns:
+            int: minimal level of records to keep.
+        """
+        if name not in self._cache:
+            parent = name
+            while parent not in self.levels and "." in parent:
+                parent = parent.rsplit(".", 1)[0]
+
+            self._cache[name] = self.levels.get(parent, logging.NOTSET)
+
+        return self._cache[name]
+
+    def filter(self, record):
+        return record.levelno >= self.get_minimal_level(record.name)
+
+
+class MessageFilter(logging.Filter):  # pylint: disable=too-few-public-methods
+    """Keep only records whose message matches the given patterns.
+
+    Attributes:
+        include (list): compiled regular expressions, a message must match at
+            least one of them (unless it's empty).
+        exclude (list): compiled regular expressions, a message must match
+            none of them.
+    """
+    def __init__(self, include=(), exclude=()):
+        super(MessageFilter, self).__init__()
+        self.include = [re.compile(pattern) for pattern in include]
+        self.exclude = [re.compile(pattern) for pattern in exclude]
+
+    def filter(self, record):
+        message = record.getMessage()
+        if self.include and \
+                not any(pattern.search(message) for pattern in self.include):
+            return False
+
+        return not any(pattern.search(message) for pattern in self.exclude)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit the rate of records sent for a single test item.
+
+    Uses a token bucket, refilled at a constant rate up to a maximal burst.
+    Records arriving while the bucket is empty are dropped and counted, and
+    :meth:`reset` should be called whenever the current test item changes.
+
+    Attributes:
+        rate (float): number of records allowed per second.
+        burst (int): maximal number of records allowed at once, by default
+            the rate (and at least 1).
+        tokens (float): number of records currently allowed.
+        suppressed (int): number of records dropped for the current item.
+    """
+    def __init__(self, rate, burst=None):
+        super(RateLimitFilter, self).__init__()
+        if rate <= 0:
+            raise ValueError(
+                "Rate limit must be positive, got {}".format(rate))
+
+        if burst is None:
+            burst = max(1, rate)
+
+        if burst < 1:
+            raise ValueError(
+                "Rate limit burst must be at least 1, got {}".format(burst))
+
+        self.rate = rate
+        self.burst = burst
+        self.tokens = self.burst
+        self.last_time = None
+        self.suppressed = 0
+
+    def reset(self):
+        """Refill the bucket for a new test item.
+
+        Returns:
+            int: number of records dropped for the previous item.
+        """
+        suppressed = self.suppressed
+        self.tokens = self.burst
+        self.last_time = None
+        self.suppressed = 0
+        return suppressed
+
+    def filter(self, record):
+        if self.last_time is not None:
+            self.tokens = min(
+                self.burst,
+                self.tokens + (record.created - self.last_time) * self.rate)
+
+        self.last_time = record.created
+        if self.tokens < 1:
+            self.suppressed += 1
+            return False
+
+        self.tokens -= 1
+        return True
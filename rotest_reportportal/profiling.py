@@ -0,0 +1,244 @@
+"""Self-profiling of the reporting plugin, to find out where its time goes."""
+import os
+import sys
+import threading
+import collections
+from timeit import default_timer
+
+import reportportal_client
+
+
+PROFILE_DIRECTORY = "ROTEST_REPORTPORTAL_PROFILE"
+
+PROFILED_PACKAGES = (os.path.dirname(os.path.abspath(__file__)),
+                     os.path.dirname(os.path.abspath(
+                         reportportal_client.__file__)))
+
+
+class HookTimer(object):
+    """Measure the calls of the plugin's hooks.
+
+    Attributes:
+        timings (dict): number of calls, total time and maximal time in
+            seconds of every hook, by its name.
+    """
+    def __init__(self):
+        self.timings = collections.defaultdict(lambda: [0, 0.0, 0.0])
+        self.lock = threading.Lock()
+
+    def wrap(self, name, function):
+        """Return a version of the function whose calls are measured.
+
+        Args:
+            name (str): name to record the calls under.
+            function (callable): the function to measure.
+
+        Returns:
+            callable: the measured function.
+        """
+        def measured(*args, **kwargs):
+            start_time = default_timer()
+            try:
+                return function(*args, **kwargs)
+
+            finally:
+                duration = default_timer() - start_time
+                with self.lock:
+                    timing = self.timings[name]
+                    timing[0] += 1
+                    timing[1] += duration
+                    timing[2] = max(timing[2], duration)
+
+        return measured
+
+    def report(self):
+        """Return the hooks' timings, slowest first, as a text table.
+
+        Returns:
+            str: the timings report.
+        """
+        lines = ["{:<25} {:>10} {:>12} {:>12} {:>12}".format(
+            "hook", "calls", "total (s)", "mean (ms)", "max (ms)")]
+        with self.lock:
+            timings = sorted(self.timings.items(),
+                             key=lambda timing: timing[1][1], reverse=True)
+
+        for name, (calls, total, maximum) in timings:
+            lines.append("{:<25} {:>10} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+                name, calls, total, total * 1000 / calls, maximum * 1000))
+
+        return "\n".join(lines)
+
+
+class StackSampler(object):
+    """Periodically sample the stacks of the threads running plugin code.
+
+    Only stacks with frames of the plugin (or of the Report Portal client)
+    are recorded, starting from the outermost such frame, so the samples
+    show the plugin's own work and whatever it calls, but not the tests.
+    Stacks whose innermost such frame is in `IDLE_FRAMES` are skipped too,
+    since they belong to sending threads waiting for their next event.
+    Frames are only formatted for recorded stacks, and the results are
+    cached per code object, to keep each sample cheap.
+
+    Attributes:
+        interval (float): time in seconds between samples.
+        stacks (collections.Counter): number of samples of every stack, as
+            a tuple of frame names, outermost first.
+    """
+    IDLE_FRAMES = frozenset(("senders.py:_run",
+                             "buffering.py:get",
+                             "service_async.py:_monitor",
+                             "service_async.py:dequeue"))
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._profiled = {}
+        self._names = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling in a background thread."""
+        self._thread = threading.Thread(target=self._run,
+                                        name="reportportal-profiler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self._stop.set()
+        self._thread.join()
+
+    def sample(self):
+        """Record the current stack of every thread running plugin code."""
+        # pylint: disable=protected-access
+        # sys._current_frames is the documented way to get other threads'
+        # stacks, it's only underscored to discourage casual use.
+        names = None
+        for ident, frame in sys._current_frames().items():
+            if ident == self._thread.ident:
+                continue
+
+            innermost = outermost = None
+            current = frame
+            while current is not None:
+                if self._is_profiled(current.f_code):
+                    if innermost is None:
+                        innermost = current
+
+                    outermost = current
+
+                current = current.f_back
+
+            if outermost is None or \
+                    self._get_name(innermost.f_code) in self.IDLE_FRAMES:
+                continue
+
+            stack = [self._get_name(outermost.f_code)]
+            current = frame
+            while current is not outermost:
+                stack.append(self._get_name(current.f_code))
+                current = current.f_back
+
+            if names is None:
+                names = {thread.ident: thread.name
+                         for thread in threading.enumerate()}
+
+            stack[1:] = stack[:0:-1]
+            self.stacks[(names.get(ident, str(ident)),) + tuple(stack)] += 1
+
+    def _is_profiled(self, code):
+        if code not in self._profiled:
+            self._profiled[code] = \
+                code.co_filename.startswith(PROFILED_PACKAGES)
+
+        return self._profiled[code]
+
+    def _get_name(self, code):
+        if code not in self._names:
+            self._names[code] = "{}:{}".format(
+                os.path.basename(code.co_filename), code.co_name)
+
+        return self._names[code]
+
+    def report(self):
+        """Return the samples in the collapsed stack format.
+
+        Returns:
+            str: a line of semicolon separated frames and a count per stack.
+        """
+        return "\n".join("{} {}".format(";".join(stack), count)
+                         for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while True:
+            self._stop.wait(self.interval)
+            if self._stop.is_set():
+                break
+
+            self.sample()
+
+
+class Profiler(object):
+    """Profile the plugin during a run, and write the results to files.
+
+    Writes the hook timings to 'reportportal_profile.txt' and the sampled
+    stacks to 'reportportal_profile.collapsed' (which can be rendered as a
+    flame graph) in the output directory.
+
+    Attributes:
+        output (str): directory to write the results to.
+        timer (HookTimer): measures the calls of the hooks.
+        sampler (StackSampler): samples the stacks running plugin code.
+    """
+    def __init__(self, output=None, interval=0.05):
+        self.output = output if output is not None else os.getcwd()
+        self.timer = HookTimer()
+        self.sampler = StackSampler(interval=interval)
+
+    def wrap(self, name, function):
+        """Measure the calls of a function, see :meth:`HookTimer.wrap`."""
+        return self.timer.wrap(name, function)
+
+    def wrap_last(self, name, function):
+        """Measure the last profiled function, then stop and write results.
+
+        Args:
+            name (str): name to record the calls under.
+            function (callable): the function to measure.
+
+        Returns:
+            callable: the measured function, which stops the profiling
+                once it returns, so its own call appears in the results.
+        """
+        measured = self.timer.wrap(name, function)
+
+        def measured_last(*args, **kwargs):
+            try:
+                return measured(*args, **kwargs)
+
+            finally:
+                self.stop()
+
+        return measured_last
+
+    def start(self):
+        """Start sampling the stacks."""
+        self.sampler.start()
+
+    def stop(self):
+        """Stop sampling and write the results."""
+        self.sampler.stop()
+        if not os.path.isdir(self.output):
+            os.makedirs(self.output)
+
+        with open(os.path.join(self.output, "reportportal_profile.txt"),
+                  "w") as timings_file:
+            timings_file.write(self.timer.report() + "\n")
+
+        with open(os.path.join(self.output,
+                               "reportportal_profile.collapsed"),
+                  "w") as stacks_file:
+            stacks_file.write(self.sampler.report() + "\n")
@@ -0,0 +1,93 @@
+"""Sampling of passing tests, for suites too large to report in full."""
+import zlib
+
+
+class PassSampler(object):  # pylint: disable=too-few-public-methods
+    """Decide deterministically which passing tests are reported in full.
+
+    The decision is based on a hash of the test's name, so the same tests are
+    reported on every run and the chosen subset doesn't change between runs.
+
+    Attributes:
+        pass_rate (float): fraction of passing tests to report, between 0
+            (report no passing tests) and 1 (report all of them).
+    """
+    HASH_RANGE = 2 ** 32
+
+    def __init__(self, pass_rate):
+        if not 0 <= pass_rate <= 1:
+            raise ValueError(
+                "Sampling pass rate must be between 0 and 1, "
+                "got {}".format(pass_rate))
+
+        self.pass_rate = pass_rate
+
+    def should_report(self, name):
+        """Return whether a test with the given name is reported if it passes.
+
+        Args:
+            name (str): name of the test.
+
+        Returns:
+            bool: True if the test is part of the sample.
+        """
+        digest = zlib.crc32(name.encode("utf-8")) & 0xffffffff
+        return digest < self.pass_rate * self.HASH_RANGE
+
+
+class SampledService(object):
+    """Wrap a Report Portal service, holding back the events of a test.
+
+    While recording, test item and log events are kept aside instead of being
+    sent, until it's known whether the test should be reported at all. Then
+    they are either flushed to the wrapped service in their original order,
+    or discarded. Any other call is passed to the wrapped service as is.
+
+    Attributes:
+        service (ReportPortalServiceAsync): the wrapped service.
+        pending (list): the events held back, or None when not recording.
+    """
+    def __init__(self, service):
+        self.service = service
+        self.pending = None
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    @property
+    def recording(self):
+        """bool: whether events are currently being held back."""
+        return self.pending is not None
+
+    def start_recording(self):
+        """Hold back the following events, until flushed or discarded."""
+        self.pending = []
+
+    def flush(self):
+        """Send the held back events and stop recording."""
+        pending, self.pending = self.pending, None
+        for method, kwargs in pending:
+            getattr(self.service, method)(**kwargs)
+
+    def discard(self):
+        """Drop the held back events and stop recording."""
+        self.pending = None
+
+    def _call(self, method, **kwargs):
+        if self.recording:
+            self.pending.append((method, kwargs))
+
+        else:
+            getattr(self.service, method)(**kwargs)
+
+    def start_test_item(self, **kwargs):
+        """Start a test item, or hold the event back while recording."""
+        self._call("start_test_item", **kwargs)
+
+    def finish_test_item(self, **kwargs):
+        """Finish a test item, or hold the event back while recording."""
+        self._call("finish_test_item", **kwargs)
+
+    def log(self, **kwargs):
+        """Send a log message, or hold it back while recording."""
+        self._call("log", **kwargs)
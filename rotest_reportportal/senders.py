@@ -0,0 +1,387 @@
+"""Sending of Report Portal events through several worker threads."""
+import sys
+import uuid
+import logging
+import threading
+from timeit import default_timer
+
+try:
+    import queue
+
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
+from reportportal_client import ReportPortalService
+
+from rotest_reportportal.fanout import SendingErrorReporter
+
+
+logger = logging.getLogger(__name__)
+
+
+class Item(object):
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """A test item (or the launch itself), as known to the sender threads.
+
+    Attributes:
+        key (str): UUID of the item, identifying it in the events and
+            choosing the lane sending them.
+        parent (Item): the item containing this one, or None for the launch.
+        lane (SenderLane): the lane sending the item's events, once chosen.
+        id (str): the item's id in Report Portal, once it was started.
+        children (list): items started under this one and not finished yet.
+        finishing (bool): whether the item's finish event was queued.
+        started (threading.Event): set once the item was started.
+        finished (threading.Event): set once the item was finished.
+    """
+    def __init__(self, parent, lane=None):
+        self.key = uuid.uuid4().hex
+        self.parent = parent
+        self.lane = lane
+        self.id = None  # pylint: disable=invalid-name
+        self.children = []
+        self.finishing = False
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+
+class SenderLane(object):
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    """A worker thread sending the events of some of the items, in order.
+
+    Every lane has its own connection to Report Portal. Logs of the same item
+    are posted in batches, which are sent when full, when another event
+    arrives, or when the lane has nothing else to do.
+
+    Events refer to their item by its key, so they can be serialized by
+    the queue, and are resolved using the registry of the running items.
+
+    Attributes:
+        name (str): name of the lane, for the statistics.
+        client (ReportPortalService): the lane's connection to Report Portal.
+        items (dict): the items not finished yet, by their key.
+        queue (queue.Queue): the events waiting to be sent.
+        busy_time (float): total time in seconds spent sending events.
+        wait_time (float): total time in seconds spent waiting for other
+            lanes, to start a parent item or finish the child items.
+        events (int): number of events handled.
+    """
+    STOP = None
+
+    def __init__(self, name, client, items, error_handler,
+                 log_batch_size=20, event_queue=None):
+        self.name = name
+        self.client = client
+        self.items = items
+        self.error_handler = error_handler
+        self.log_batch_size = log_batch_size
+        self.queue = event_queue if event_queue is not None \
+            else queue.Queue()
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.events = 0
+        self.log_item = None
+        self.log_batch = []
+        self._nowait = False
+        self._thread = threading.Thread(target=self._run,
+                                        name="reportportal-" + name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, method, item, kwargs):
+        """Queue an event for sending.
+
+        Args:
+            method (str): name of the Report Portal client's method.
+            item (Item): the item the event belongs to.
+            kwargs (dict): the arguments of the method.
+        """
+        self.queue.put_nowait((method, item.key, kwargs))
+
+    def stop(self, nowait=False):
+        """Send the remaining events and stop the thread.
+
+        Args:
+            nowait (bool): whether to drop the remaining events instead.
+        """
+        self._nowait = nowait
+        self.queue.put_nowait(self.STOP)
+        self._thread.join()
+
+    def statistics(self):
+        """Return the lane's statistics.
+
+        Returns:
+            dict: the lane's name, queue depth, busy time, wait time and
+                event count.
+        """
+        return {"name": self.name,
+                "queue_depth": self.queue.qsize(),
+                "busy_time": self.busy_time,
+                "wait_time": self.wait_time,
+                "events": self.events}
+
+    def _run(self):
+        while True:
+            try:
+                event = self.queue.get_nowait()
+
+            except queue.Empty:
+                self._post_log_batch()
+                event = self.queue.get()
+
+            if event is self.STOP:
+                break
+
+            if self._nowait:
+                self._release(event)
+                break
+
+            start_time = default_timer()
+            wait_time = self.wait_time
+            try:
+                self._handle(*event)
+
+            except Exception:  # pylint: disable=broad-except
+                # Errors are reported, and must not stop the lane
+                self.error_handler(sys.exc_info())
+
+            self.busy_time += default_timer() - start_time - \
+                (self.wait_time - wait_time)
+            self.events += 1
+
+        if not self._nowait:
+            self._post_log_batch()
+            return
+
+        # Release other lanes that may be waiting for the dropped events
+        while True:
+            try:
+                event = self.queue.get_nowait()
+
+            except queue.Empty:
+                break
+
+            if event is not self.STOP:
+                self._release(event)
+
+    def _release(self, event):
+        """Mark the item of a dropped event as started and finished."""
+        _, key, _ = event
+        item = self.items.pop(key, None)
+        if item is not None:
+            item.started.set()
+            item.finished.set()
+
+    def _wait(self, event):
+        start_time = default_timer()
+        event.wait()
+        self.wait_time += default_timer() - start_time
+
+    def _post_log_batch(self):
+        if not self.log_batch:
+            return
+
+        log_item, log_batch = self.log_item, self.log_batch
+        self.log_item, self.log_batch = None, []
+        try:
+            if log_item.parent is None:
+                self.client.stack = [None]
+                self.client.log_batch(log_batch)
+
+            elif log_item.id is not None:
+                self.client.stack = [log_item.id]
+                self.client.log_batch(log_batch)
+
+        except Exception:  # pylint: disable=broad-except
+            # Errors are reported, and must not stop the lane
+            self.error_handler(sys.exc_info())
+
+    def _handle(self, method, key, kwargs):
+        item = self.items[key]
+        if method == "log":
+            if item is not self.log_item:
+                self._post_log_batch()
+                self.log_item = item
+
+            self.log_batch.append(kwargs)
+            if len(self.log_batch) >= self.log_batch_size:
+                self._post_log_batch()
+
+            return
+
+        self._post_log_batch()
+        getattr(self, "_" + method)(item, **kwargs)
+
+    def _start_launch(self, item, **kwargs):
+        try:
+            item.id = self.client.start_launch(**kwargs)
+
+        finally:
+            item.started.set()
+
+    def _wait_for_children(self, item):
+        for child in list(item.children):
+            if child.finishing:
+                self._wait(child.finished)
+
+    def _finish_launch(self, item, **kwargs):
+        self._wait_for_children(item)
+        self.items.pop(item.key, None)
+        self.client.launch_id = item.id
+        self.client.finish_launch(**kwargs)
+
+    def _start_test_item(self, item, **kwargs):
+        try:
+            launch = item.parent
+            while launch.parent is not None:
+                launch = launch.parent
+
+            self._wait(item.parent.started)
+            if item.parent.id is not None:
+                self.client.launch_id = launch.id
+                self.client.stack = [item.parent.id
+                                     if item.parent is not launch else None]
+                item.id = self.client.start_test_item(**kwargs)
+
+        finally:
+            item.started.set()
+
+    def _finish_test_item(self, item, **kwargs):
+        try:
+            self._wait_for_children(item)
+            if item.id is not None:
+                self.client.stack = [item.id]
+                self.client.finish_test_item(**kwargs)
+
+        finally:
+            item.children = []
+            self.items.pop(item.key, None)
+            item.finished.set()
+            item.parent.children.remove(item)
+
+
+class SenderPool(object):
+    """Send events to Report Portal through several worker threads.
+
+    Test items are spread between the workers by their UUID, and all the
+    events of an item are sent by the same worker, so they keep their order.
+    Launch events have a lane of their own. This way a slow event, like a
+    large upload, only delays the events of its own lane.
+
+    The pool has the same interface as `ReportPortalServiceAsync`.
+    Its methods are called from the tests' thread only.
+
+    Attributes:
+        launch_lane (SenderLane): the lane sending the launch events.
+        lanes (list): the lanes sending the test items' events.
+        items (dict): the items not finished yet, by their key.
+        error_handler (callable): called with the exception information of
+            every error that occurs while sending events.
+        launch (Item): the launch, as known to the lanes.
+        stack (list): the items currently running, innermost last.
+    """
+    # Summarizes the errors of its own error handler when terminated.
+    SUMMARIZES_ERRORS = True
+
+    def __init__(self, endpoint, project, token, workers=4,
+                 error_handler=None, log_batch_size=20,
+                 queue_factory=queue.Queue):
+        # pylint: disable=too-many-arguments
+        self.items = {}
+        self.error_handler = error_handler if error_handler is not None \
+            else SendingErrorReporter(endpoint)
+
+        def create_lane(name):
+            return SenderLane(name=name,
+                              client=ReportPortalService(endpoint=endpoint,
+                                                         project=project,
+                                                         token=token),
+                              items=self.items,
+                              error_handler=self.error_handler,
+                              log_batch_size=log_batch_size,
+                              event_queue=queue_factory())
+
+        self.launch_lane = create_lane("launch")
+        self.lanes = [create_lane("worker-{}".format(index))
+                      for index in range(workers)]
+        self.launch = None
+        self.stack = []
+
+    def statistics(self):
+        """Return the statistics of all the lanes.
+
+        Returns:
+            list: the statistics of each lane, see `SenderLane.statistics`.
+        """
+        return [lane.statistics() for lane in [self.launch_lane] + self.lanes]
+
+    def start_launch(self, name, start_time, description=None, tags=None,
+                     mode=None):
+        # pylint: disable=too-many-arguments
+        """Queue the start of the launch."""
+        self.launch = Item(parent=None, lane=self.launch_lane)
+        self.items[self.launch.key] = self.launch
+        self.stack = [self.launch]
+        self.launch_lane.put("start_launch", self.launch,
+                             {"name": name,
+                              "start_time": start_time,
+                              "description": description,
+                              "tags": tags,
+                              "mode": mode})
+
+    def finish_launch(self, end_time, status=None):
+        """Queue the finish of the launch."""
+        self.launch_lane.put("finish_launch", self.launch,
+                             {"end_time": end_time,
+                              "status": status})
+
+    def start_test_item(self, name, start_time, item_type, description=None,
+                        tags=None, parameters=None):
+        # pylint: disable=too-many-arguments
+        """Queue the start of a test item, under the current one."""
+        parent = self.stack[-1]
+        item = Item(parent=parent)
+        item.lane = self.lanes[int(item.key, 16) % len(self.lanes)]
+        self.items[item.key] = item
+        parent.children.append(item)
+        self.stack.append(item)
+        item.lane.put("start_test_item", item,
+                      {"name": name,
+                       "start_time": start_time,
+                       "item_type": item_type,
+                       "description": description,
+                       "tags": tags,
+                       "parameters": parameters})
+
+    def finish_test_item(self, end_time, status, issue=None):
+        """Queue the finish of the current test item."""
+        item = self.stack.pop()
+        item.finishing = True
+        item.lane.put("finish_test_item", item,
+                      {"end_time": end_time,
+                       "status": status,
+                       "issue": issue})
+
+    def log(self, time, message, level=None, attachment=None):
+        """Queue a log message of the current test item."""
+        item = self.stack[-1]
+        item.lane.put("log", item,
+                      {"time": time,
+                       "message": message,
+                       "level": level,
+                       "attachment": attachment})
+
+    def terminate(self, nowait=False):
+        """Send the remaining events and stop all the lanes.
+
+        Args:
+            nowait (bool): whether to drop the remaining events instead.
+        """
+        for lane in self.lanes + [self.launch_lane]:
+            lane.stop(nowait=nowait)
+            logger.debug("Report Portal sender statistics: %s",
+                         lane.statistics())
+
+        if isinstance(self.error_handler, SendingErrorReporter):
+            self.error_handler.summarize()
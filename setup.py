@@ -16,6 +16,7 @@ setup(
     install_requires=['rotest',
                       'attrdict',
                       'pyyaml',
+                      'psutil',
                       'reportportal_client'],
     extras_require={
         "dev": ["flake8", "pylint",
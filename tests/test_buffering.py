@@ -0,0 +1,108 @@
+import threading
+
+try:
+    import queue
+
+except ImportError:
+    import Queue as queue
+
+import mock
+import pytest
+
+from rotest_reportportal.buffering import SpillBuffer, SpillQueue
+
+
+def test_buffer_in_memory():
+    buffer = SpillBuffer()
+    for index in range(10):
+        buffer.append({"message": index})
+
+    assert buffer.spilled == 0
+    assert len(buffer) == 10
+    assert [item["message"] for item in buffer] == list(range(10))
+    assert buffer.popleft() == {"message": 0}
+
+
+def test_buffer_spilling_keeps_order():
+    buffer = SpillBuffer(max_bytes=100)
+    for index in range(50):
+        buffer.append({"message": "message {}".format(index)})
+
+    assert buffer.spilled > 0
+    assert buffer.memory_bytes <= 100
+    assert list(buffer) == [{"message": "message {}".format(index)}
+                            for index in range(50)]
+
+    popped = [buffer.popleft() for _ in range(30)]
+    for index in range(50, 60):
+        buffer.append({"message": "message {}".format(index)})
+
+    popped.extend(buffer.popleft() for _ in range(len(buffer)))
+    assert popped == [{"message": "message {}".format(index)}
+                      for index in range(60)]
+    assert buffer.spilled == 0
+
+    buffer.close()
+
+
+def test_buffer_clear():
+    buffer = SpillBuffer(max_bytes=10)
+    for index in range(10):
+        buffer.append(index)
+
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert list(buffer) == []
+    buffer.append("reason")
+    assert list(buffer) == ["reason"]
+
+
+@mock.patch("rotest_reportportal.buffering.psutil")
+def test_buffer_rss_budget(psutil_patch):
+    psutil_patch.Process.return_value.memory_info.return_value.rss = 2000
+    buffer = SpillBuffer(max_rss=1000, retained_bytes=20)
+    for index in range(SpillBuffer.RSS_CHECK_INTERVAL - 1):
+        buffer.append(index)
+
+    assert buffer.spilled == 0
+    buffer.append("last")
+
+    assert 0 < buffer.memory_bytes <= 20
+    assert buffer.spilled == len(buffer) - len(buffer.memory)
+    assert list(buffer)[-1] == "last"
+
+
+def test_queue():
+    event_queue = SpillQueue(max_bytes=50)
+
+    def produce():
+        for index in range(100):
+            event_queue.put_nowait(("log", index))
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+
+    assert [event_queue.get(timeout=5) for _ in range(100)] == \
+        [("log", index) for index in range(100)]
+
+    producer.join()
+    with pytest.raises(queue.Empty):
+        event_queue.get_nowait()
+
+
+def test_spill_file_is_compacted():
+    buffer = SpillBuffer(max_bytes=0)
+    buffer.COMPACT_SIZE = 1000
+    item = {"message": "x" * 50}
+    for _ in range(20):
+        buffer.append(item)
+
+    for _ in range(2000):
+        buffer.append(item)
+        assert buffer.popleft() == item
+
+    buffer._file.seek(0, 2)
+    assert buffer._file.tell() < 3000
+    assert len(buffer) == 20
+    assert list(buffer) == [item] * 20
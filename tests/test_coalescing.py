@@ -0,0 +1,48 @@
+from rotest_reportportal.coalescing import LogCoalescer
+
+
+def test_coalescing_lines():
+    coalescer = LogCoalescer(window=1, max_size=100)
+
+    assert coalescer.add(created=10, time="1", level="INFO",
+                         message="first") is None
+    assert coalescer.add(created=10.5, time="2", level="INFO",
+                         message="second") is None
+
+    assert coalescer.flush() == {"time": "1",
+                                 "level": "INFO",
+                                 "message": "first\nsecond"}
+    assert coalescer.flush() is None
+
+
+def test_level_change_closes_entry():
+    coalescer = LogCoalescer(window=1, max_size=100)
+
+    coalescer.add(created=10, time="1", level="INFO", message="first")
+    entry = coalescer.add(created=10, time="2", level="ERROR",
+                          message="second")
+
+    assert entry == {"time": "1", "level": "INFO", "message": "first"}
+    assert coalescer.flush() == {"time": "2",
+                                 "level": "ERROR",
+                                 "message": "second"}
+
+
+def test_window_closes_entry():
+    coalescer = LogCoalescer(window=1, max_size=100)
+
+    coalescer.add(created=10, time="1", level="INFO", message="first")
+    entry = coalescer.add(created=11.5, time="2", level="INFO",
+                          message="second")
+
+    assert entry == {"time": "1", "level": "INFO", "message": "first"}
+
+
+def test_size_closes_entry():
+    coalescer = LogCoalescer(window=1, max_size=10)
+
+    coalescer.add(created=10, time="1", level="INFO", message="12345")
+    entry = coalescer.add(created=10, time="2", level="INFO",
+                          message="67890")
+
+    assert entry == {"time": "1", "level": "INFO", "message": "12345"}
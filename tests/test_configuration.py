@@ -56,3 +56,67 @@ def test_missing_token(search_config_patch, open_patch):
                        match="You need to define the environment variable .* "
                              "in order to access Report Portal"):
         get_configuration()
+
+
+@mock.patch.dict("os.environ",
+                 {"ROTEST_REPORTPORTAL_TOKEN": "token",
+                  "QA_TOKEN": "qa token"})
+@mock.patch("rotest_reportportal.open")
+@mock.patch("rotest_reportportal.search_config_file")
+def test_multiple_destinations(search_config_patch, open_patch):
+    search_config_patch.return_value = "rotest.yaml"
+    mock.mock_open(open_patch, read_data="""\
+        reportportal:
+            destinations:
+                - endpoint: http://team:8000
+                  project: team
+                - endpoint: http://qa:8000
+                  project: qa
+                  token_variable: QA_TOKEN
+                  level: WARN
+    """)
+
+    configuration = get_configuration()
+
+    team, qa = configuration.destinations
+    assert team.endpoint == "http://team:8000"
+    assert team.token == "token"
+    assert qa.project == "qa"
+    assert qa.token == "qa token"
+    assert qa.level == "WARN"
+
+
+@mock.patch.dict("os.environ", {"ROTEST_REPORTPORTAL_TOKEN": "token"})
+@mock.patch("rotest_reportportal.open")
+@mock.patch("rotest_reportportal.search_config_file")
+def test_missing_destination_token(search_config_patch, open_patch):
+    search_config_patch.return_value = "rotest.yaml"
+    mock.mock_open(open_patch, read_data="""\
+        reportportal:
+            destinations:
+                - endpoint: http://qa:8000
+                  project: qa
+                  token_variable: QA_TOKEN
+    """)
+
+    with pytest.raises(ValueError,
+                       match="You need to define the environment variable "
+                             "QA_TOKEN"):
+        get_configuration()
+
+
+@mock.patch.dict("os.environ", {"ROTEST_REPORTPORTAL_TOKEN": "token"})
+@mock.patch("rotest_reportportal.open")
+@mock.patch("rotest_reportportal.search_config_file")
+def test_unknown_destination_level(search_config_patch, open_patch):
+    search_config_patch.return_value = "rotest.yaml"
+    mock.mock_open(open_patch, read_data="""\
+        reportportal:
+            destinations:
+                - endpoint: http://qa:8000
+                  project: qa
+                  level: WARNING
+    """)
+
+    with pytest.raises(ValueError, match="Unknown log level 'WARNING'"):
+        get_configuration()
@@ -0,0 +1,88 @@
+import mock
+import pytest
+
+from rotest_reportportal.fanout import FanOutService, SendingErrorReporter
+
+
+def test_events_sent_to_all_destinations():
+    first, second = mock.Mock(), mock.Mock()
+    service = FanOutService([(first, None), (second, None)])
+
+    service.start_test_item(name="Case", start_time="123", item_type="STEP")
+    service.terminate()
+
+    for destination in (first, second):
+        destination.start_test_item.assert_called_once_with(
+            name="Case", start_time="123", item_type="STEP")
+        destination.terminate.assert_called_once_with(nowait=False)
+
+
+def test_destination_log_level():
+    verbose, quiet = mock.Mock(), mock.Mock()
+    service = FanOutService([(verbose, None), (quiet, "WARN")])
+
+    service.log(time="123", message="Info message", level="INFO")
+    service.log(time="123", message="Error message", level="ERROR")
+
+    assert verbose.log.call_count == 2
+    quiet.log.assert_called_once_with(time="123", message="Error message",
+                                      level="ERROR", attachment=None)
+
+
+def test_fatal_log_level():
+    quiet = mock.Mock()
+    service = FanOutService([(quiet, "ERROR")])
+
+    service.log(time="123", message="Fatal message", level="FATAL")
+    service.log(time="123", message="Warning message", level="WARN")
+
+    quiet.log.assert_called_once_with(time="123", message="Fatal message",
+                                      level="FATAL", attachment=None)
+
+
+def test_unknown_destination_level():
+    with pytest.raises(ValueError, match="Unknown log level 'WARNING'"):
+        FanOutService([(mock.Mock(), "WARNING")])
+
+
+@mock.patch("rotest_reportportal.fanout.logger")
+@mock.patch("rotest_reportportal.fanout.default_timer")
+def test_sending_errors_are_summarized(timer_patch, logger_patch):
+    reporter = SendingErrorReporter("http://host:8000", interval=60)
+    service = mock.Mock(error_handler=reporter)
+    fan_out = FanOutService([(service, None)])
+
+    timer_patch.return_value = 0
+    for _ in range(100):
+        reporter((RuntimeError, RuntimeError("error"), None))
+
+    assert logger_patch.error.call_count == 1
+    timer_patch.return_value = 61
+    reporter((RuntimeError, RuntimeError("error"), None))
+    reporter((RuntimeError, RuntimeError("error"), None))
+
+    assert logger_patch.error.call_count == 2
+    assert logger_patch.error.call_args[0][1:4] == \
+        (100, "http://host:8000", 101)
+
+    fan_out.terminate()
+    assert logger_patch.error.call_count == 3
+    assert reporter.errors == 102
+    assert reporter.unreported == 0
+
+
+@mock.patch("rotest_reportportal.fanout.logger")
+def test_self_summarizing_services_not_summarized(logger_patch):
+    class Service(object):
+        SUMMARIZES_ERRORS = True
+        terminate = mock.Mock()
+
+    reporter = SendingErrorReporter("http://host:8000")
+    service = Service()
+    service.error_handler = reporter
+    for _ in range(2):
+        reporter((RuntimeError, RuntimeError("error"), None))
+
+    FanOutService([(service, None)]).terminate()
+
+    logger_patch.error.assert_called_once()
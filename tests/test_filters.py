@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+from rotest_reportportal.filters import (LoggerLevelFilter, MessageFilter,
+                                         RateLimitFilter)
+
+
+@pytest.mark.parametrize("name,level,accepted", [
+    ("paramiko", logging.INFO, False),
+    ("paramiko.transport", logging.INFO, False),
+    ("paramiko.transport", logging.WARNING, True),
+    ("paramiko.sftp", logging.DEBUG, True),
+    ("rotest", logging.DEBUG, True),
+])
+def test_logger_level_filter(name, level, accepted):
+    log_filter = LoggerLevelFilter({"paramiko": "WARNING",
+                                    "paramiko.sftp": logging.DEBUG})
+
+    record = logging.makeLogRecord(dict(name=name, levelno=level))
+
+    assert log_filter.filter(record) == accepted
+
+
+@pytest.mark.parametrize("message,accepted", [
+    ("Sent command", True),
+    ("Sent heartbeat", False),
+    ("Received reply", False),
+])
+def test_message_filter(message, accepted):
+    log_filter = MessageFilter(include=["^Sent"], exclude=["heartbeat"])
+
+    record = logging.makeLogRecord(dict(msg=message))
+
+    assert log_filter.filter(record) == accepted
+
+
+def test_rate_limit_filter():
+    log_filter = RateLimitFilter(rate=1, burst=2)
+
+    accepted = [log_filter.filter(logging.makeLogRecord(dict(created=10)))
+                for _ in range(5)]
+
+    assert accepted == [True, True, False, False, False]
+    assert log_filter.filter(logging.makeLogRecord(dict(created=11)))
+    assert log_filter.reset() == 3
+    assert log_filter.filter(logging.makeLogRecord(dict(created=11)))
+
+
+def test_rate_limit_filter_below_one_per_second():
+    log_filter = RateLimitFilter(rate=0.5)
+
+    accepted = [log_filter.filter(logging.makeLogRecord(dict(created=time)))
+                for time in (0, 1, 2, 10)]
+
+    assert accepted == [True, False, True, True]
+
+
+@pytest.mark.parametrize("rate,burst", [(0, None), (-1, None), (1, 0.5)])
+def test_invalid_rate_limit(rate, burst):
+    with pytest.raises(ValueError, match="must be"):
+        RateLimitFilter(rate=rate, burst=burst)
+
+
+def test_unknown_level():
+    with pytest.raises(ValueError, match="Unknown logging level 'VERBOSE'"):
+        LoggerLevelFilter({"paramiko": "VERBOSE"})
@@ -4,6 +4,8 @@ import logging
 import pytest
 
 from rotest_reportportal import ReportPortalLogHandler
+from rotest_reportportal.filters import LoggerLevelFilter
+from rotest_reportportal.coalescing import LogCoalescer
 
 
 @pytest.mark.parametrize("logging_level,level_text", [
@@ -27,3 +29,71 @@ def test_log_handler(logging_level, level_text):
     service.log.assert_called_once_with(time="123",
                                         message="The message",
                                         level=level_text)
+
+
+def test_log_handler_coalescing():
+    service = mock.Mock(log=mock.Mock())
+
+    log_handler = ReportPortalLogHandler(
+        service=service, coalescer=LogCoalescer(window=1, max_size=100))
+
+    with mock.patch("rotest_reportportal.timestamp", side_effect=["1", "2"]):
+        for message in ("first", "second"):
+            log_handler.emit(logging.makeLogRecord(
+                dict(levelno=logging.INFO, msg=message)))
+
+    service.log.assert_not_called()
+    log_handler.flush()
+
+    service.log.assert_called_once_with(time="1",
+                                        message="first\nsecond",
+                                        level="INFO")
+
+
+def test_log_handler_level_conversion():
+    service = mock.Mock(log=mock.Mock())
+
+    record = logging.makeLogRecord(
+        dict(levelno=logging.CRITICAL, msg="The message"))
+
+    log_handler = ReportPortalLogHandler(
+        service=service, level_conversion={"CRITICAL": "FATAL"})
+
+    with mock.patch("rotest_reportportal.timestamp", return_value="123"):
+        log_handler.emit(record)
+
+    service.log.assert_called_once_with(time="123",
+                                        message="The message",
+                                        level="FATAL")
+
+
+def test_filtered_record_is_not_formatted():
+    service = mock.Mock(log=mock.Mock())
+
+    record = logging.makeLogRecord(
+        dict(name="paramiko", levelno=logging.DEBUG, msg="The message"))
+
+    log_handler = ReportPortalLogHandler(service=service)
+    log_handler.addFilter(LoggerLevelFilter({"paramiko": "WARNING"}))
+
+    with mock.patch.object(log_handler, "format") as format_patch:
+        log_handler.handle(record)
+
+    format_patch.assert_not_called()
+    service.log.assert_not_called()
+
+
+def test_log_handler_positional_level():
+    service = mock.Mock(log=mock.Mock())
+
+    log_handler = ReportPortalLogHandler(service, logging.INFO)
+
+    assert log_handler.level == logging.INFO
+    assert log_handler.coalescer is None
+    log_handler.flush()
+
+
+def test_log_handler_unknown_level_conversion():
+    with pytest.raises(ValueError, match="Unknown logging level"):
+        ReportPortalLogHandler(service=mock.Mock(),
+                               level_conversion={"VERBOSE": "TRACE"})
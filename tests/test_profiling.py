@@ -0,0 +1,80 @@
+import os
+import time
+import threading
+
+import mock
+
+from rotest_reportportal.senders import SenderPool
+from rotest_reportportal.profiling import HookTimer, StackSampler, Profiler
+
+
+def test_hook_timer():
+    timer = HookTimer()
+    hook = timer.wrap("hook", lambda value: value * 2)
+
+    assert hook(2) == 4
+    assert hook(3) == 6
+
+    calls, total, maximum = timer.timings["hook"]
+    assert calls == 2
+    assert 0 <= maximum <= total
+    assert timer.report().splitlines()[1].split()[:2] == ["hook", "2"]
+
+
+def test_stack_sampler_records_plugin_frames():
+    release = threading.Event()
+    hook = HookTimer().wrap("hook", release.wait)
+    worker = threading.Thread(target=hook, name="worker")
+    worker.start()
+
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    deadline = time.time() + 5
+    while not sampler.stacks and time.time() < deadline:
+        time.sleep(0.001)
+
+    sampler.stop()
+    release.set()
+    worker.join()
+
+    assert sampler.stacks
+    for stack in sampler.stacks:
+        assert stack[:2] == ("worker", "profiling.py:measured")
+
+
+@mock.patch("rotest_reportportal.senders.ReportPortalService")
+def test_stack_sampler_skips_idle_senders(_client_patch):
+    pool = SenderPool(endpoint="http://host:8000", project="nightly",
+                      token="token", workers=3)
+    release = threading.Event()
+    hook = HookTimer().wrap("hook", release.wait)
+    worker = threading.Thread(target=hook, name="worker")
+    worker.start()
+
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    deadline = time.time() + 5
+    while sum(sampler.stacks.values()) < 20 and time.time() < deadline:
+        time.sleep(0.001)
+
+    sampler.stop()
+    release.set()
+    worker.join()
+    pool.terminate()
+
+    assert sum(sampler.stacks.values()) >= 20
+    assert set(stack[0] for stack in sampler.stacks) == {"worker"}
+
+
+def test_profiler_writes_results(tmpdir):
+    output = str(tmpdir.join("profile"))
+    profiler = Profiler(output=output, interval=0.001)
+    profiler.start()
+    profiler.wrap("hook", lambda: None)()
+    profiler.stop()
+
+    with open(os.path.join(output, "reportportal_profile.txt")) as timings:
+        assert "hook" in timings.read()
+
+    assert os.path.exists(os.path.join(output,
+                                       "reportportal_profile.collapsed"))
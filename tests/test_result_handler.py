@@ -1,4 +1,7 @@
 import mock
+import logging
+
+from attrdict import AttrDict
 from rotest.core.case import TestCase
 from rotest.core.suite import TestSuite
 from rotest.core.models.case_data import TestOutcome
@@ -23,6 +26,78 @@ def test_result_handler_creation(configuration_patch, service_patch):
                                           token="token")
 
 
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_result_handler_destinations(configuration_patch, service_patch):
+    configuration_patch.return_value = AttrDict(destinations=[
+        {"endpoint": "http://team:8000", "project": "team", "token": "token"},
+        {"endpoint": "http://qa:8000", "project": "qa", "token": "qa token",
+         "level": "WARN"}])
+
+    main_test = mock.Mock()
+
+    handler = ReportPortalHandler(main_test=main_test)
+
+    assert service_patch.call_count == 2
+    service_patch.assert_called_with(endpoint="http://qa:8000",
+                                     project="qa",
+                                     token="qa token",
+                                     error_handler=mock.ANY)
+    assert len(handler.service.destinations) == 2
+
+
+@mock.patch("rotest_reportportal.SenderPool")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_result_handler_senders(configuration_patch, service_patch,
+                                pool_patch):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        senders=4)
+
+    main_test = mock.Mock()
+
+    ReportPortalHandler(main_test=main_test)
+
+    service_patch.assert_not_called()
+    pool_patch.assert_called_once_with(endpoint="http://host:8000",
+                                       project="nightly",
+                                       token="token",
+                                       workers=4)
+
+
+@mock.patch("rotest_reportportal.SenderPool")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_result_handler_buffer(configuration_patch, service_patch,
+                               pool_patch):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        buffer={"max_bytes": 1024})
+
+    main_test = mock.Mock()
+
+    handler = ReportPortalHandler(main_test=main_test)
+
+    service_patch.assert_not_called()
+    pool_patch.assert_called_once_with(endpoint="http://host:8000",
+                                       project="nightly",
+                                       token="token",
+                                       workers=1,
+                                       queue_factory=mock.ANY)
+    queue_factory = pool_patch.call_args[1]["queue_factory"]
+    assert queue_factory().buffer.max_bytes == 1024
+    assert handler.comments.max_bytes == 1024
+
+
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_comments_without_buffer(_configuration_patch, _service_patch):
+    handler = ReportPortalHandler(main_test=mock.Mock())
+
+    assert handler.comments == []
+
+
 @mock.patch("rotest_reportportal.timestamp", return_value="123")
 @mock.patch("rotest_reportportal.ReportPortalServiceAsync")
 @mock.patch("rotest_reportportal.get_configuration")
@@ -189,6 +264,7 @@ def test_starting_suite(_configuration_patch, service_patch, _time_patch):
         start_time="123",
         item_type="Suite"
     )
+    assert handler.omitted_passes == [0]
 
 
 @mock.patch("rotest_reportportal.timestamp", return_value="123")
@@ -423,3 +499,175 @@ def test_terminates_successfully_without_interrupt(_configuration_patch,
     handler.stop_test_run()
     service_patch.return_value.terminate.assert_called()
     service_patch.return_value.terminate.reset_mock()
+
+
+@mock.patch("rotest_reportportal.timestamp", return_value="123")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_sampled_out_success(configuration_patch, service_patch, _time_patch):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        sampling={"pass_rate": 0})
+
+    main_test = mock.Mock(spec=TestSuite)
+
+    suite = mock.MagicMock(spec=TestSuite,
+                           data=mock.MagicMock(success=True),
+                           __doc__="Suite documentation.")
+
+    case = mock.MagicMock(
+        spec=TestCase,
+        work_dir=".",
+        data=mock.MagicMock(exception_type=TestOutcome.SUCCESS))
+    case.data.name = "Case.test_method"
+
+    handler = ReportPortalHandler(main_test=main_test)
+    handler.start_composite(suite)
+    handler.start_test(case)
+    handler.stop_test(case)
+    handler.stop_composite(suite)
+
+    service = service_patch.return_value
+    service.start_test_item.assert_called_once()
+    service.log.assert_called_once_with(
+        time="123",
+        level="INFO",
+        message="1 passing tests were not reported individually "
+                "(sampled at a rate of 0)")
+    service.finish_test_item.assert_called_once_with(end_time="123",
+                                                     status="PASSED")
+
+
+@mock.patch("rotest_reportportal.timestamp", return_value="123")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_sampled_out_top_level_success(configuration_patch, service_patch,
+                                       _time_patch):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        sampling={"pass_rate": 0})
+
+    main_test = mock.MagicMock(spec=TestSuite, data=mock.MagicMock())
+
+    case = mock.MagicMock(
+        spec=TestCase,
+        work_dir=".",
+        data=mock.MagicMock(exception_type=TestOutcome.SUCCESS))
+    case.data.name = "Case.test_method"
+
+    handler = ReportPortalHandler(main_test=main_test)
+    handler.start_test_run()
+    handler.start_test(case)
+    handler.stop_test(case)
+    handler.stop_test_run()
+
+    service = service_patch.return_value
+    assert [call[0] for call in service.method_calls] == [
+        "start_launch", "start_test_item", "log", "finish_test_item",
+        "finish_launch", "terminate"]
+    service.start_test_item.assert_called_once_with(
+        name="Sampled out passing tests",
+        description=mock.ANY,
+        start_time="123",
+        item_type="Suite")
+    service.log.assert_called_once_with(
+        time="123",
+        level="INFO",
+        message="1 passing tests were not reported individually "
+                "(sampled at a rate of 0)")
+
+
+@mock.patch("rotest_reportportal.timestamp", return_value="123")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_sampled_out_failure(configuration_patch, service_patch, _time_patch):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        sampling={"pass_rate": 0})
+
+    main_test = mock.Mock(parents_count=0)
+
+    case = mock.MagicMock(
+        spec=TestCase,
+        work_dir=".",
+        data=mock.MagicMock(exception_type=TestOutcome.FAILED))
+    case.shortDescription = mock.MagicMock(return_value="Case documentation.")
+    case.data.name = "Case.test_method"
+    case.TAGS = None
+
+    handler = ReportPortalHandler(main_test=main_test)
+    handler.start_test(case)
+    handler.add_failure(case, exception_string="Exception message.")
+    handler.stop_test(case)
+
+    service = service_patch.return_value
+    service.start_test_item.assert_called_once_with(
+        name="Case.test_method",
+        description="Case documentation.",
+        tags=None,
+        start_time="123",
+        item_type="STEP"
+    )
+    service.finish_test_item.assert_called_once_with(
+        end_time="123",
+        status="FAILED",
+        issue={"issue_type": "PRODUCT_BUG",
+               "comment": "Exception message."}
+    )
+
+
+@mock.patch("rotest_reportportal.timestamp", return_value="123")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_suppressed_logs(configuration_patch, service_patch, _time_patch):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        filters={"rate_limit": {"rate": 1, "burst": 1}})
+
+    main_test = mock.Mock(parents_count=0)
+
+    case = mock.MagicMock(
+        spec=TestCase,
+        data=mock.MagicMock(exception_type=TestOutcome.SUCCESS))
+
+    handler = ReportPortalHandler(main_test=main_test)
+    for _ in range(3):
+        handler.log_handler.handle(logging.makeLogRecord(
+            dict(levelno=logging.INFO, msg="The message", created=10)))
+
+    handler.stop_test(case)
+
+    service = service_patch.return_value
+    assert service.log.call_count == 2
+    service.log.assert_called_with(
+        time="123",
+        level="WARN",
+        message="2 log messages were suppressed by the rate limit")
+
+
+@mock.patch("rotest_reportportal.timestamp", return_value="123")
+@mock.patch("rotest_reportportal.ReportPortalServiceAsync")
+@mock.patch("rotest_reportportal.get_configuration")
+def test_profiling(configuration_patch, _service_patch, _time_patch, tmpdir):
+    configuration_patch.return_value = AttrDict(
+        endpoint="http://host:8000", project="nightly", token="token",
+        profiling={"output": str(tmpdir), "interval": 0.001})
+
+    main_test = mock.Mock(parents_count=0)
+
+    case = mock.MagicMock(
+        spec=TestCase,
+        data=mock.MagicMock(exception_type=TestOutcome.ERROR))
+
+    handler = ReportPortalHandler(main_test=main_test)
+    handler.start_test_run()
+    handler.add_error(case, exception_string="Exception message.")
+    handler.stop_test(case)
+    handler.stop_test_run()
+
+    timings = tmpdir.join("reportportal_profile.txt").read()
+    for hook in ("start_test_run", "add_error", "stop_test", "stop_test_run",
+                 "terminate"):
+        assert hook in timings
+
+    assert tmpdir.join("reportportal_profile.collapsed").check()
@@ -0,0 +1,57 @@
+import mock
+import pytest
+
+from rotest_reportportal.sampling import PassSampler, SampledService
+
+
+def test_sampling_is_deterministic():
+    sampler = PassSampler(pass_rate=0.5)
+    names = ["Case.test_{}".format(index) for index in range(100)]
+
+    decisions = [sampler.should_report(name) for name in names]
+
+    assert decisions == [sampler.should_report(name) for name in names]
+    assert 20 < sum(decisions) < 80
+
+
+@pytest.mark.parametrize("pass_rate,reported", [(0, False), (1, True)])
+def test_sampling_edge_rates(pass_rate, reported):
+    sampler = PassSampler(pass_rate=pass_rate)
+
+    assert all(sampler.should_report("Case.test_{}".format(index)) == reported
+               for index in range(100))
+
+
+def test_invalid_pass_rate():
+    with pytest.raises(ValueError, match="must be between 0 and 1"):
+        PassSampler(pass_rate=2)
+
+
+def test_sampled_service_flush():
+    service = mock.Mock()
+    sampled_service = SampledService(service)
+
+    sampled_service.start_recording()
+    sampled_service.start_test_item(name="Case")
+    sampled_service.log(message="The message")
+    service.start_test_item.assert_not_called()
+
+    sampled_service.flush()
+
+    assert service.method_calls == [mock.call.start_test_item(name="Case"),
+                                    mock.call.log(message="The message")]
+    sampled_service.finish_test_item(status="FAILED")
+    service.finish_test_item.assert_called_once_with(status="FAILED")
+
+
+def test_sampled_service_discard():
+    service = mock.Mock()
+    sampled_service = SampledService(service)
+
+    sampled_service.start_recording()
+    sampled_service.start_test_item(name="Case")
+    sampled_service.discard()
+    sampled_service.terminate()
+
+    service.start_test_item.assert_not_called()
+    service.terminate.assert_called_once_with()
@@ -0,0 +1,173 @@
+import functools
+import itertools
+import threading
+
+import mock
+
+from rotest_reportportal.senders import Item, SenderLane, SenderPool
+from rotest_reportportal.buffering import SpillQueue
+
+
+class FakeClient(object):
+    """Record the calls sent to Report Portal, with the ids they used."""
+    ids = itertools.count()
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, **_kwargs):
+        self.stack = [None]
+        self.launch_id = None
+
+    def _record(self, *call):
+        with self.lock:
+            self.calls.append(call)
+
+    def start_launch(self, **_kwargs):
+        launch_id = "launch-{}".format(next(self.ids))
+        self._record("start_launch", launch_id)
+        return launch_id
+
+    def finish_launch(self, **_kwargs):
+        self._record("finish_launch", self.launch_id)
+
+    def start_test_item(self, name, **_kwargs):
+        item_id = name
+        self._record("start_test_item", item_id, self.stack[-1])
+        return item_id
+
+    def finish_test_item(self, **_kwargs):
+        self._record("finish_test_item", self.stack[-1])
+
+    def log_batch(self, log_data):
+        self._record("log_batch", self.stack[-1],
+                     [log["message"] for log in log_data])
+
+
+@mock.patch("rotest_reportportal.senders.ReportPortalService", FakeClient)
+def test_sender_pool_ordering():
+    FakeClient.calls = []
+    pool = SenderPool(endpoint="http://host:8000", project="nightly",
+                      token="token", workers=3)
+
+    pool.start_launch(name="run", start_time="1")
+    pool.start_test_item(name="suite", start_time="1", item_type="SUITE")
+    for index in range(10):
+        name = "case-{}".format(index)
+        pool.start_test_item(name=name, start_time="1", item_type="STEP")
+        pool.log(time="1", message="{} first".format(name))
+        pool.log(time="1", message="{} second".format(name))
+        pool.finish_test_item(end_time="2", status="PASSED")
+
+    pool.finish_test_item(end_time="2", status="PASSED")
+    pool.finish_launch(end_time="2")
+    pool.terminate()
+
+    calls = FakeClient.calls
+    launch_id = calls[0][1]
+    assert calls[0] == ("start_launch", launch_id)
+    assert calls[1] == ("start_test_item", "suite", None)
+    assert calls[-2] == ("finish_test_item", "suite")
+    assert calls[-1] == ("finish_launch", launch_id)
+
+    for index in range(10):
+        name = "case-{}".format(index)
+        item_calls = [call for call in calls if name in call or
+                      call == ("start_test_item", name, "suite")]
+        assert item_calls == [
+            ("start_test_item", name, "suite"),
+            ("log_batch", name, ["{} first".format(name),
+                                 "{} second".format(name)]),
+            ("finish_test_item", name)]
+
+    statistics = pool.statistics()
+    assert len(statistics) == 4
+    assert sum(lane["events"] for lane in statistics) == 44
+    assert all(lane["queue_depth"] == 0 for lane in statistics)
+    assert all(0 <= lane["busy_time"] and 0 <= lane["wait_time"]
+               for lane in statistics)
+
+
+@mock.patch("rotest_reportportal.senders.ReportPortalService", FakeClient)
+def test_failing_item_start():
+    FakeClient.calls = []
+    error_handler = mock.Mock()
+    pool = SenderPool(endpoint="http://host:8000", project="nightly",
+                      token="token", workers=2, error_handler=error_handler)
+
+    with mock.patch.object(FakeClient, "start_test_item",
+                           side_effect=RuntimeError):
+        pool.start_launch(name="run", start_time="1")
+        pool.start_test_item(name="case", start_time="1", item_type="STEP")
+        pool.log(time="1", message="message")
+        pool.finish_test_item(end_time="2", status="PASSED")
+        pool.finish_launch(end_time="2")
+        pool.terminate()
+
+    error_handler.assert_called_once()
+    assert [call[0] for call in FakeClient.calls] == \
+        ["start_launch", "finish_launch"]
+
+
+@mock.patch("rotest_reportportal.fanout.logger")
+@mock.patch("rotest_reportportal.senders.ReportPortalService", FakeClient)
+def test_sending_errors_summarized_on_terminate(logger_patch):
+    FakeClient.calls = []
+    pool = SenderPool(endpoint="http://host:8000", project="nightly",
+                      token="token", workers=2)
+
+    with mock.patch.object(FakeClient, "start_test_item",
+                           side_effect=RuntimeError):
+        pool.start_launch(name="run", start_time="1")
+        for index in range(3):
+            pool.start_test_item(name="case-{}".format(index),
+                                 start_time="1", item_type="STEP")
+            pool.finish_test_item(end_time="2", status="PASSED")
+
+        pool.finish_launch(end_time="2")
+        pool.terminate()
+
+    assert logger_patch.error.call_count == 2
+    assert logger_patch.error.call_args[0][1:4] == \
+        (2, "http://host:8000", 3)
+    assert pool.error_handler.unreported == 0
+
+
+@mock.patch("rotest_reportportal.senders.ReportPortalService", FakeClient)
+def test_sender_pool_spilling_queues():
+    FakeClient.calls = []
+    pool = SenderPool(endpoint="http://host:8000", project="nightly",
+                      token="token", workers=2,
+                      queue_factory=functools.partial(SpillQueue,
+                                                      max_bytes=100))
+
+    pool.start_launch(name="run", start_time="1")
+    pool.start_test_item(name="case", start_time="1", item_type="STEP")
+    messages = ["message {}".format(index) for index in range(50)]
+    for message in messages:
+        pool.log(time="1", message=message)
+
+    pool.finish_test_item(end_time="2", status="PASSED")
+    pool.finish_launch(end_time="2")
+    pool.terminate()
+
+    assert [message
+            for call in FakeClient.calls if call[0] == "log_batch"
+            for message in call[2]] == messages
+    assert FakeClient.calls[-2:] == [("finish_test_item", "case"),
+                                     ("finish_launch", FakeClient.calls[0][1])]
+
+
+def test_dropped_event_releases_item():
+    launch = Item(parent=None)
+    item = Item(parent=launch)
+    items = {launch.key: launch, item.key: item}
+    lane = SenderLane(name="worker", client=FakeClient(), items=items,
+                      error_handler=mock.Mock())
+
+    lane._nowait = True
+    lane.put("start_test_item", item, {"name": "case"})
+
+    assert item.started.wait(5)
+    assert item.finished.is_set()
+    lane.stop(nowait=True)
+    assert item.key not in items